@@ -0,0 +1,70 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+from app.schemas.profiling import ProfilingSessionCreate, ProfilingSessionResponse
+from app.services.profiler_service import ProfilingSession, profiler_service
+
+
+def require_profiling_token(
+    x_profiling_token: Optional[str] = Header(default=None),
+) -> None:
+    if not settings.PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if x_profiling_token is None or not secrets.compare_digest(
+        x_profiling_token, settings.PROFILING_TOKEN
+    ):
+        raise HTTPException(status_code=401, detail="Invalid profiling token")
+
+
+router = APIRouter(
+    prefix="/admin/profiling",
+    tags=["profiling"],
+    dependencies=[Depends(require_profiling_token)],
+)
+
+
+def get_session_or_404(session_id: str) -> ProfilingSession:
+    session = profiler_service.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Profiling session not found")
+    return session
+
+
+@router.post("/sessions", response_model=ProfilingSessionResponse, status_code=201)
+async def start_profiling_session(params: ProfilingSessionCreate):
+    """Profile the next N requests (or a time window) on a single route"""
+    try:
+        session = profiler_service.start_session(params)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return session.to_response()
+
+
+@router.get("/sessions/{session_id}", response_model=ProfilingSessionResponse)
+async def get_profiling_session(session_id: str):
+    """Get session progress and any slow calls that blocked the event loop"""
+    return get_session_or_404(session_id).to_response()
+
+
+@router.post("/sessions/{session_id}/stop", response_model=ProfilingSessionResponse)
+async def stop_profiling_session(session_id: str):
+    """Stop a session before its request count or duration is reached"""
+    session = get_session_or_404(session_id)
+    session.stop()
+    return session.to_response()
+
+
+@router.get("/sessions/{session_id}/flamegraph", response_class=PlainTextResponse)
+async def download_flamegraph(session_id: str):
+    """Download samples in collapsed-stack format for flamegraph tools"""
+    session = get_session_or_404(session_id)
+    return PlainTextResponse(
+        session.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{session.id}.folded"'
+        },
+    )
@@ -1,4 +1,5 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
@@ -25,9 +26,11 @@ def get_trade_service(db: Session = Depends(get_db)) -> TradeService:
 async def create_trade(
     trade_data: TradeCreate, trade_service: TradeService = Depends(get_trade_service)
 ):
-    """Create a new crypto derivative trade"""
+    """Submit a limit or market order for a crypto derivative"""
     try:
         return await trade_service.create_trade(trade_data)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create trade: {str(e)}")
 
@@ -44,12 +47,18 @@ async def simulate_margin_requirements(
 @router.get("/recent", response_model=List[TradeResponse])
 async def get_recent_trades(
     limit: int = Query(
-        default=20, le=100, description="Number of recent trades to return"
+        default=20, ge=1, le=100, description="Number of recent trades to return"
+    ),
+    symbol: Optional[str] = Query(
+        default=None, description="Only return trades for this symbol"
+    ),
+    since: Optional[datetime] = Query(
+        default=None, description="Only return trades created at or after this time"
     ),
     trade_service: TradeService = Depends(get_trade_service),
 ):
     """Get recent trades from cache"""
-    return await trade_service.get_recent_trades(limit)
+    return await trade_service.get_recent_trades(limit, symbol, since)
 
 
 @router.get("/{trade_id}", response_model=TradeResponse)
@@ -61,3 +70,30 @@ async def get_trade(
     if not trade:
         raise HTTPException(status_code=404, detail="Trade not found")
     return trade
+
+
+@router.get("/{trade_id}/fills", response_model=List[TradeResponse])
+async def get_trade_fills(
+    trade_id: int, trade_service: TradeService = Depends(get_trade_service)
+):
+    """Get the fills that executed against an order"""
+    fills = await trade_service.get_order_fills(trade_id)
+    if fills is None:
+        raise HTTPException(status_code=404, detail="Trade not found")
+    return fills
+
+
+@router.post("/{trade_id}/cancel", response_model=TradeResponse)
+async def cancel_trade(
+    trade_id: int, trade_service: TradeService = Depends(get_trade_service)
+):
+    """Cancel a resting (pending) order"""
+    try:
+        trade = await trade_service.cancel_trade(trade_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to cancel trade: {str(e)}")
+    if not trade:
+        raise HTTPException(status_code=404, detail="Trade not found")
+    return trade
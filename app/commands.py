@@ -0,0 +1,34 @@
+import argparse
+import asyncio
+
+from app.database import SessionLocal
+from app.services.cache_service import CacheService
+from app.services.trade_service import TradeService
+
+
+async def rebuild_indexes(batch_size: int) -> None:
+    db = SessionLocal()
+    try:
+        trade_service = TradeService(db, CacheService())
+        count = await trade_service.rebuild_trade_indexes(batch_size)
+        print(f"✅ Indexed {count} trades")
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Trade tracker maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-indexes", help="Rebuild Redis trade indexes from the database"
+    )
+    rebuild.add_argument("--batch-size", type=int, default=1000)
+
+    args = parser.parse_args()
+    if args.command == "rebuild-indexes":
+        asyncio.run(rebuild_indexes(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import trades
+from app.api import profiling, trades
 from app.config import settings
+from app.services.profiler_service import ProfilingMiddleware
 
 app = FastAPI(
     title="Crypto Derivatives Trade Tracker",
@@ -19,8 +20,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# On-demand sampling profiler (see /admin/profiling)
+app.add_middleware(ProfilingMiddleware)
+
+
 # Include routers
 app.include_router(trades.router)
+app.include_router(profiling.router)
 
 
 @app.get("/")
@@ -37,10 +44,18 @@ async def health_check():
 async def startup_event():
     """Initialize database tables on startup (if database is available)"""
     try:
-        from app.database import Base, engine
+        from app.database import Base, SessionLocal, engine
+        from app.services.trade_service import TradeService
 
         Base.metadata.create_all(bind=engine)
         print("✅ Database tables created successfully")
+
+        db = SessionLocal()
+        try:
+            restored = TradeService(db, cache_service=None).restore_order_books()
+        finally:
+            db.close()
+        print(f"✅ Restored {restored} resting orders into the order books")
     except Exception as e:
         print(f"⚠️  Database not available: {e}")
         print(
@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, DateTime, Enum, Integer, Numeric, String
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, Numeric, String
 from sqlalchemy.sql import func
 
 from app.database import Base
@@ -11,6 +11,11 @@ class TradeSide(str, enum.Enum):
     SHORT = "short"
 
 
+class OrderType(str, enum.Enum):
+    LIMIT = "limit"
+    MARKET = "market"
+
+
 class TradeStatus(str, enum.Enum):
     PENDING = "pending"
     FILLED = "filled"
@@ -27,5 +32,9 @@ class Trade(Base):
     price = Column(Numeric(18, 2), nullable=False)  # Entry price
     status = Column(Enum(TradeStatus), default=TradeStatus.PENDING)
     leverage = Column(Integer, default=1)
+    # Orders keep their original size and limit price and track how much has
+    # filled; each fill is its own FILLED row pointing back at its order
+    filled_size = Column(Numeric(18, 8), nullable=False, default=0)
+    order_id = Column(Integer, ForeignKey("trades.id"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, field_validator
+from starlette.routing import compile_path
+
+
+class ProfilingSessionCreate(BaseModel):
+    route: str = Field(..., json_schema_extra={"example": "/trades/simulate-margin"})
+    requests: int = Field(default=10, ge=1, le=1000)
+    duration_seconds: float = Field(default=60, gt=0, le=600)
+    interval_ms: float = Field(default=5, ge=1, le=100)
+    block_threshold_ms: float = Field(default=20, ge=1, le=10000)
+
+    @field_validator("route")
+    @classmethod
+    def check_route(cls, route: str) -> str:
+        if not route.startswith("/"):
+            raise ValueError("route must start with '/'")
+        try:
+            compile_path(route)
+        except AssertionError as e:  # Unknown path convertor
+            raise ValueError(str(e))
+        return route
+
+
+class SlowCall(BaseModel):
+    duration_ms: float
+    location: str
+    stack: str
+
+
+class ProfilingSessionResponse(BaseModel):
+    id: str
+    route: str
+    status: str
+    requests_target: int
+    requests_profiled: int
+    sample_count: int
+    started_at: datetime
+    ended_at: Optional[datetime] = None
+    slow_calls: List[SlowCall]
@@ -2,17 +2,37 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer, model_validator
 
-from app.models.trade import TradeSide, TradeStatus
+from app.models.trade import OrderType, TradeSide, TradeStatus
 
 
 class TradeCreate(BaseModel):
     symbol: str = Field(..., json_schema_extra={"example": "BTC-PERP"})
     side: TradeSide
-    size: Decimal = Field(..., gt=0, json_schema_extra={"example": "0.1"})
-    price: Decimal = Field(..., gt=0, json_schema_extra={"example": "45000.00"})
+    # Scales match the Numeric columns so the order book and rows never differ
+    size: Decimal = Field(
+        ...,
+        gt=0,
+        max_digits=18,
+        decimal_places=8,
+        json_schema_extra={"example": "0.1"},
+    )
+    price: Optional[Decimal] = Field(
+        default=None,
+        gt=0,
+        max_digits=18,
+        decimal_places=2,
+        json_schema_extra={"example": "45000.00"},
+    )
     leverage: int = Field(default=1, ge=1, le=100)
+    order_type: OrderType = OrderType.LIMIT
+
+    @model_validator(mode="after")
+    def check_limit_price(self):
+        if self.order_type == OrderType.LIMIT and self.price is None:
+            raise ValueError("price is required for limit orders")
+        return self
 
 
 class TradeResponse(BaseModel):
@@ -23,11 +43,18 @@ class TradeResponse(BaseModel):
     price: Decimal
     status: TradeStatus
     leverage: int
+    filled_size: Decimal = Decimal("0")
+    order_id: Optional[int] = None  # Set on fills; the order they belong to
     created_at: datetime
     updated_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True}
 
+    @field_serializer("filled_size")
+    def serialize_filled_size(self, filled_size: Decimal) -> str:
+        # Fixed-point, so an unfilled order shows 0.00000000 rather than 0E-8
+        return f"{filled_size:f}"
+
 
 class MarginSimulation(BaseModel):
     symbol: str
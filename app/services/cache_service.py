@@ -1,11 +1,28 @@
 import json
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
 
 import redis
 
 from app.config import settings
 from app.schemas.trade import TradeResponse
 
+# Overwrite a list entry in place (keeps its position); no-op if it was trimmed
+REPLACE_IN_LIST_SCRIPT = """
+local index = redis.call('LPOS', KEYS[1], ARGV[1])
+if index then
+    redis.call('LSET', KEYS[1], index, ARGV[2])
+end
+return index
+"""
+
+
+def to_epoch(value: datetime) -> float:
+    """Convert a datetime to a sorted-set score (naive values are UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
 
 class CacheService:
     def __init__(self):
@@ -13,22 +30,70 @@ class CacheService:
         self.recent_trades_key = "recent_trades"
         self.max_recent_trades = 100
 
+        # Sorted-set indexes of trade ids scored by created_at epoch
+        self.all_trades_index_key = "trades:index:all"
+        self.symbol_index_prefix = "trades:index:symbol:"
+        self.max_indexed_trades = 1000  # Retention per index
+
+    def symbol_index_key(self, symbol: str) -> str:
+        return f"{self.symbol_index_prefix}{symbol}"
+
+    def _index_trade(self, pipe, trade: TradeResponse) -> None:
+        """Queue index updates for a trade on a pipeline"""
+        score = to_epoch(trade.created_at)
+        for key in (self.all_trades_index_key, self.symbol_index_key(trade.symbol)):
+            pipe.zadd(key, {str(trade.id): score})
+            # Keep only the newest entries (lowest scores are removed first)
+            pipe.zremrangebyrank(key, 0, -self.max_indexed_trades - 1)
+
     async def cache_trade(self, trade: TradeResponse) -> None:
         """Cache a trade in Redis"""
         trade_data = trade.model_dump_json()
 
-        # Add to recent trades list (LPUSH adds to front)
-        self.redis_client.lpush(self.recent_trades_key, trade_data)
+        # MULTI/EXEC so the list and indexes never disagree
+        with self.redis_client.pipeline(transaction=True) as pipe:
+            # Add to recent trades list (LPUSH adds to front)
+            pipe.lpush(self.recent_trades_key, trade_data)
 
-        # Trim list to max size
-        self.redis_client.ltrim(self.recent_trades_key, 0, self.max_recent_trades - 1)
+            # Trim list to max size
+            pipe.ltrim(self.recent_trades_key, 0, self.max_recent_trades - 1)
 
-        # Set expiration for the key (24 hours)
-        self.redis_client.expire(self.recent_trades_key, 24 * 60 * 60)
+            # Set expiration for the key (24 hours)
+            pipe.expire(self.recent_trades_key, 24 * 60 * 60)
 
-    async def get_recent_trades(self, limit: int = 20) -> List[TradeResponse]:
-        """Get recent trades from Redis"""
-        trade_strings = self.redis_client.lrange(self.recent_trades_key, 0, limit - 1)
+            self._index_trade(pipe, trade)
+            pipe.execute()
+
+    async def replace_trade(self, old: TradeResponse, trade: TradeResponse) -> None:
+        """Swap a trade's cached snapshot after its status or size changes"""
+        old_data = old.model_dump_json()
+        trade_data = trade.model_dump_json()
+
+        with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.eval(
+                REPLACE_IN_LIST_SCRIPT,
+                1,
+                self.recent_trades_key,
+                old_data,
+                trade_data,
+            )
+            pipe.setex(f"trade:{trade.id}", 60 * 60, trade_data)
+            pipe.execute()
+
+    async def index_trades(self, trades: Iterable[TradeResponse]) -> None:
+        """Add a batch of trades to the symbol and time indexes"""
+        with self.redis_client.pipeline(transaction=True) as pipe:
+            for trade in trades:
+                self._index_trade(pipe, trade)
+            pipe.execute()
+
+    async def clear_trade_indexes(self) -> None:
+        """Remove every symbol and time index"""
+        keys = list(self.redis_client.scan_iter(f"{self.symbol_index_prefix}*"))
+        keys.append(self.all_trades_index_key)
+        self.redis_client.delete(*keys)
+
+    def _parse_trades(self, trade_strings: List[str]) -> List[TradeResponse]:
         trades = []
 
         for trade_str in trade_strings:
@@ -40,6 +105,37 @@ class CacheService:
 
         return trades
 
+    async def get_recent_trades(self, limit: int = 20) -> List[TradeResponse]:
+        """Get recent trades from Redis"""
+        trade_strings = self.redis_client.lrange(self.recent_trades_key, 0, limit - 1)
+        return self._parse_trades(trade_strings)
+
+    async def get_indexed_trade_ids(
+        self,
+        limit: int = 20,
+        symbol: Optional[str] = None,
+        since: Optional[datetime] = None,
+    ) -> List[int]:
+        """Get the newest trade ids for a symbol and/or since a time, newest first"""
+        if limit < 1:  # ZREVRANGEBYSCORE treats a negative count as "all"
+            return []
+        key = self.symbol_index_key(symbol) if symbol else self.all_trades_index_key
+        min_score = to_epoch(since) if since else "-inf"
+        trade_ids = self.redis_client.zrevrangebyscore(
+            key, "+inf", min_score, start=0, num=limit
+        )
+        return [int(trade_id) for trade_id in trade_ids]
+
+    async def get_trades_by_ids(self, trade_ids: List[int]) -> Dict[int, TradeResponse]:
+        """Get cached trades by ID; ids missing from the cache are omitted"""
+        if not trade_ids:
+            return {}
+        trade_strings = self.redis_client.mget(
+            [f"trade:{trade_id}" for trade_id in trade_ids]
+        )
+        trades = self._parse_trades([data for data in trade_strings if data])
+        return {trade.id: trade for trade in trades}
+
     async def get_trade_by_id(self, trade_id: int) -> Optional[TradeResponse]:
         """Get a specific trade from cache"""
         trade_key = f"trade:{trade_id}"
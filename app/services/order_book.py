@@ -0,0 +1,201 @@
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from app.models.trade import TradeSide
+
+
+class Order:
+    __slots__ = ("id", "side", "price", "remaining")
+
+    def __init__(self, order_id: int, side: TradeSide, price, remaining):
+        self.id = order_id
+        self.side = side
+        self.price = price  # None for market orders
+        self.remaining = remaining
+
+
+class PriceLevel:
+    __slots__ = ("orders", "live")
+
+    def __init__(self):
+        self.orders: Deque[Order] = deque()
+        self.live = 0  # Resting orders not yet cancelled
+
+
+class Fill:
+    __slots__ = ("maker", "taker", "price", "size")
+
+    def __init__(self, maker: Order, taker: Order, price, size):
+        self.maker = maker
+        self.taker = taker
+        self.price = price  # Always the resting (maker) price
+        self.size = size
+
+
+class OrderBook:
+    """Price-time priority limit order book for a single symbol.
+
+    Each side keeps a map of price -> FIFO level of resting orders plus an
+    ascending list of the prices that have a level, so the best bid is the
+    last entry and the best ask the first. Cancels are O(1): the order is
+    zeroed and skipped when it reaches the front of its queue, and the level
+    is dropped once it has no live orders. LONG orders buy and SHORT orders
+    sell. Prices and sizes can be any ordered numeric type (``Decimal`` in the
+    service layer).
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self._bids: Dict[object, PriceLevel] = {}
+        self._asks: Dict[object, PriceLevel] = {}
+        self._bid_prices: List = []
+        self._ask_prices: List = []
+        self._orders: Dict[int, Order] = {}
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def best_bid(self):
+        return self._bid_prices[-1] if self._bid_prices else None
+
+    def best_ask(self):
+        return self._ask_prices[0] if self._ask_prices else None
+
+    def best_price_for(self, side: TradeSide):
+        """Best opposite-side price an incoming order of ``side`` would hit"""
+        return self.best_ask() if side is TradeSide.LONG else self.best_bid()
+
+    def get_order(self, order_id: int) -> Optional[Order]:
+        return self._orders.get(order_id)
+
+    def submit_limit(self, order_id: int, side: TradeSide, price, size) -> List[Fill]:
+        """Match a limit order and rest any remainder on the book"""
+        order = Order(order_id, side, price, size)
+        fills = self._match(order, price)
+        if order.remaining:
+            self._rest(order)
+        return fills
+
+    def submit_market(self, order_id: int, side: TradeSide, size) -> List[Fill]:
+        """Match a market order; any remainder is dropped (immediate-or-cancel)"""
+        return self._match(Order(order_id, side, None, size), None)
+
+    def restore(self, order_id: int, side: TradeSide, price, size) -> None:
+        """Rest a previously accepted order without matching it"""
+        if size > 0:
+            self._rest(Order(order_id, side, price, size))
+
+    def cancel(self, order_id: int) -> Optional[Order]:
+        """Remove a resting order; returns it, or None if it is not resting"""
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return None
+
+        if order.side is TradeSide.LONG:
+            levels, prices = self._bids, self._bid_prices
+        else:
+            levels, prices = self._asks, self._ask_prices
+
+        level = levels[order.price]
+        level.live -= 1
+        if not level.live:
+            del levels[order.price]
+            del prices[bisect_left(prices, order.price)]
+
+        remaining = order.remaining
+        order.remaining = 0  # Marks the queued entry as dead
+        return Order(order.id, order.side, order.price, remaining)
+
+    def _rest(self, order: Order) -> None:
+        if order.side is TradeSide.LONG:
+            levels, prices = self._bids, self._bid_prices
+        else:
+            levels, prices = self._asks, self._ask_prices
+
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = PriceLevel()
+            insort(prices, order.price)
+        level.orders.append(order)
+        level.live += 1
+        self._orders[order.id] = order
+
+    def _match(self, taker: Order, limit) -> List[Fill]:
+        fills = []
+        buying = taker.side is TradeSide.LONG
+        levels = self._asks if buying else self._bids
+        prices = self._ask_prices if buying else self._bid_prices
+        orders = self._orders
+
+        while taker.remaining and prices:
+            price = prices[0] if buying else prices[-1]
+            if limit is not None and (price > limit if buying else price < limit):
+                break
+
+            level = levels[price]
+            queue = level.orders
+            while taker.remaining and level.live and queue:
+                maker = queue[0]
+                if not maker.remaining:  # Cancelled
+                    queue.popleft()
+                    continue
+
+                size = min(maker.remaining, taker.remaining)
+                maker.remaining -= size
+                taker.remaining -= size
+                fills.append(Fill(maker, taker, price, size))
+                if not maker.remaining:
+                    queue.popleft()
+                    level.live -= 1
+                    del orders[maker.id]
+
+            if not level.live or not queue:
+                del levels[price]
+                if buying:
+                    del prices[0]
+                else:
+                    prices.pop()
+
+        return fills
+
+
+class OrderBooks:
+    """In-process registry of order books, one per symbol.
+
+    Books live in the API process's memory, so they are only consistent with
+    a single worker; resting orders are reloaded from PENDING trades on
+    startup. A symbol is marked stale when its book may no longer match the
+    database and a reload failed; it must be reloaded before it is used.
+    """
+
+    def __init__(self):
+        self._books: Dict[str, OrderBook] = {}
+        self._stale: Set[str] = set()
+
+    def get(self, symbol: str) -> OrderBook:
+        book = self._books.get(symbol)
+        if book is None:
+            book = self._books[symbol] = OrderBook(symbol)
+        return book
+
+    def replace(self, symbol: str, book: OrderBook) -> None:
+        """Swap in a freshly loaded book for a symbol"""
+        self._books[symbol] = book
+        self._stale.discard(symbol)
+
+    def replace_all(self, books: Dict[str, OrderBook]) -> None:
+        self._books = dict(books)
+        self._stale.clear()
+
+    def mark_stale(self, symbol: str) -> None:
+        self._stale.add(symbol)
+
+    def is_stale(self, symbol: str) -> bool:
+        return symbol in self._stale
+
+    def clear(self) -> None:
+        self.replace_all({})
+
+
+order_books = OrderBooks()
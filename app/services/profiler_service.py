@@ -0,0 +1,234 @@
+import asyncio
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Deque, List, Optional
+
+from starlette.routing import compile_path
+
+from app.schemas.profiling import (
+    ProfilingSessionCreate,
+    ProfilingSessionResponse,
+    SlowCall,
+)
+
+MAX_STACK_DEPTH = 128
+MAX_SLOW_CALLS = 100
+
+
+def collapse_stack(frame) -> str:
+    """Render a frame chain as a root-first, semicolon-separated stack"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        module = frame.f_globals.get("__name__", "?")
+        labels.append(f"{module}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def frame_location(frame) -> str:
+    """Describe where a frame is currently executing"""
+    code = frame.f_code
+    return f"{code.co_filename}:{frame.f_lineno} in {code.co_qualname}"
+
+
+class ProfilingSession:
+    """Samples the event loop thread while requests to one route are in flight.
+
+    A background thread reads the loop thread's current frame every
+    ``interval_ms``. Samples are only kept while a profiled request is running,
+    but loop stalls are detected for the whole session: a heartbeat task on the
+    loop updates a timestamp, and when it goes stale for longer than
+    ``block_threshold_ms`` the blocking frame is reported as a slow call.
+    """
+
+    def __init__(self, params: ProfilingSessionCreate, thread_id: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.route = params.route
+        # Routes may be templates such as /trades/{trade_id}
+        self.route_regex, _, _ = compile_path(params.route)
+        self.requests_target = params.requests
+        self.interval = params.interval_ms / 1000
+        self.block_threshold = params.block_threshold_ms / 1000
+        self.deadline = time.monotonic() + params.duration_seconds
+        self.thread_id = thread_id
+
+        self.started_at = datetime.now(timezone.utc)
+        self.ended_at: Optional[datetime] = None
+        self.requests_started = 0
+        self.requests_profiled = 0
+        self.in_flight = 0
+        self.sample_count = 0
+        self.stacks: Counter = Counter()
+        self.slow_calls: List[SlowCall] = []
+        self.heartbeat = time.monotonic()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name=f"profiler-{self.id}", daemon=True
+        )
+
+    @property
+    def is_active(self) -> bool:
+        return not self._done.is_set()
+
+    def matches(self, path: str) -> bool:
+        return self.route_regex.match(path) is not None
+
+    def start(self) -> None:
+        """Start sampling; must be called from the event loop thread"""
+        self._loop = asyncio.get_running_loop()
+        # Keep a strong reference; the loop only holds tasks weakly
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._sampler.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._done.is_set():
+                return
+            self.ended_at = datetime.now(timezone.utc)
+            self._done.set()
+
+        # stop() may run on the sampler thread, so cancel via the loop
+        if self._heartbeat_task is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._heartbeat_task.cancel)
+            except RuntimeError:  # Loop closed in the meantime
+                pass
+
+    def begin_request(self) -> bool:
+        """Admit a request into the session, up to the requested count"""
+        with self._lock:
+            if self._done.is_set() or self.requests_started >= self.requests_target:
+                return False
+            self.requests_started += 1
+            self.in_flight += 1
+            return True
+
+    def end_request(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.requests_profiled += 1
+            finished = self.requests_profiled >= self.requests_target
+        if finished:
+            self.stop()
+
+    def collapsed(self) -> str:
+        """Samples in collapsed-stack format (flamegraph.pl, speedscope)"""
+        with self._lock:
+            stacks = list(self.stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks))
+
+    def to_response(self) -> ProfilingSessionResponse:
+        with self._lock:
+            return ProfilingSessionResponse(
+                id=self.id,
+                route=self.route,
+                status="active" if self.is_active else "completed",
+                requests_target=self.requests_target,
+                requests_profiled=self.requests_profiled,
+                sample_count=self.sample_count,
+                started_at=self.started_at,
+                ended_at=self.ended_at,
+                slow_calls=list(self.slow_calls),
+            )
+
+    async def _heartbeat(self) -> None:
+        while not self._done.is_set():
+            self.heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _sample_loop(self) -> None:
+        stalled_beat = None
+        stall_recorded = False
+        while not self._done.wait(self.interval):
+            now = time.monotonic()
+            if now >= self.deadline:
+                self.stop()
+                break
+
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:  # Loop thread has gone away
+                self.stop()
+                break
+
+            # The heartbeat sleeps for one interval, so anything beyond that is
+            # time the loop spent unable to run callbacks
+            beat = self.heartbeat
+            lag = now - beat - self.interval
+            with self._lock:
+                if lag >= self.block_threshold:
+                    if beat != stalled_beat:
+                        stalled_beat = beat
+                        stall_recorded = len(self.slow_calls) < MAX_SLOW_CALLS
+                        if stall_recorded:
+                            self.slow_calls.append(
+                                SlowCall(
+                                    duration_ms=lag * 1000,
+                                    location=frame_location(frame),
+                                    stack=collapse_stack(frame),
+                                )
+                            )
+                    elif stall_recorded:
+                        self.slow_calls[-1].duration_ms = lag * 1000
+
+                if self.in_flight:
+                    self.stacks[collapse_stack(frame)] += 1
+                    self.sample_count += 1
+            del frame
+
+
+class ProfilerService:
+    def __init__(self, history: int = 10):
+        self.active: Optional[ProfilingSession] = None
+        self.sessions: Deque[ProfilingSession] = deque(maxlen=history)
+
+    def start_session(self, params: ProfilingSessionCreate) -> ProfilingSession:
+        """Start profiling a route; must be called from the event loop thread"""
+        if self.active is not None and self.active.is_active:
+            raise ValueError(f"Profiling session {self.active.id} is already active")
+
+        session = ProfilingSession(params, threading.get_ident())
+        session.start()
+        self.active = session
+        self.sessions.append(session)
+        return session
+
+    def get_session(self, session_id: str) -> Optional[ProfilingSession]:
+        for session in self.sessions:
+            if session.id == session_id:
+                return session
+        return None
+
+
+class ProfilingMiddleware:
+    """Plain ASGI pass-through unless a profiling session targets the route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        session = profiler_service.active
+        if (
+            scope["type"] != "http"
+            or session is None
+            or not session.is_active
+            or not session.matches(scope["path"])
+            or not session.begin_request()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.end_request()
+
+
+profiler_service = ProfilerService()
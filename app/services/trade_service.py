@@ -1,9 +1,10 @@
+from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
-from app.models.trade import Trade, TradeStatus
+from app.models.trade import OrderType, Trade, TradeStatus
 from app.schemas.trade import (
     MarginResponse,
     MarginSimulation,
@@ -11,6 +12,7 @@ from app.schemas.trade import (
     TradeResponse,
 )
 from app.services.cache_service import CacheService
+from app.services.order_book import Fill, OrderBook, order_books
 
 
 class TradeService:
@@ -19,27 +21,198 @@ class TradeService:
         self.cache_service = cache_service
 
     async def create_trade(self, trade_data: TradeCreate) -> TradeResponse:
-        """Create a new trade"""
+        """Submit an order to the symbol's order book and persist its fills"""
+        book = self._get_order_book(trade_data.symbol)
+        is_market = trade_data.order_type == OrderType.MARKET
+        if is_market:
+            # Recorded at the top of book; execution prices are on the fills
+            price = book.best_price_for(trade_data.side)
+            if price is None:
+                raise ValueError(f"No resting orders for {trade_data.symbol}")
+        else:
+            price = trade_data.price
+
         db_trade = Trade(
             symbol=trade_data.symbol,
             side=trade_data.side,
             size=trade_data.size,
-            price=trade_data.price,
+            price=price,
             leverage=trade_data.leverage,
-            status=TradeStatus.FILLED,  # Simulate immediate fill for MVP
+            status=TradeStatus.PENDING,
+            filled_size=Decimal("0"),
+        )
+        try:
+            new_trades, makers, previous = self._execute_order(
+                book, db_trade, is_market
+            )
+        except Exception:
+            # The book was changed before the commit; resync it with the database
+            self._recover_order_book(trade_data.symbol)
+            raise
+
+        # Cache new rows and replace stale snapshots of the resting orders
+        for trade in new_trades:
+            trade_response = TradeResponse.model_validate(trade)
+            await self.cache_service.cache_trade(trade_response)
+            await self.cache_service.cache_trade_by_id(trade_response)
+
+        for trade_id, maker in makers.items():
+            await self.cache_service.replace_trade(
+                previous[trade_id], TradeResponse.model_validate(maker)
+            )
+
+        return TradeResponse.model_validate(db_trade)
+
+    async def cancel_trade(self, trade_id: int) -> Optional[TradeResponse]:
+        """Cancel a resting (PENDING) order"""
+        db_trade = self.db.query(Trade).filter(Trade.id == trade_id).first()
+        if not db_trade:
+            return None
+        if db_trade.status != TradeStatus.PENDING:
+            raise ValueError(f"Trade {trade_id} is not an open order")
+
+        previous = TradeResponse.model_validate(db_trade)
+        book = self._get_order_book(db_trade.symbol)
+        db_trade.status = TradeStatus.CANCELLED
+        try:
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        # Only leave the book once the cancel is persisted
+        book.cancel(trade_id)
+
+        trade_response = TradeResponse.model_validate(db_trade)
+        await self.cache_service.replace_trade(previous, trade_response)
+        return trade_response
+
+    def restore_order_books(self, symbol: Optional[str] = None) -> int:
+        """Reload resting (PENDING) orders into the in-memory order books.
+
+        Rebuilds every book, or only ``symbol``'s book when one is given. The
+        rows are loaded before any book is swapped, so a failed query leaves
+        the current books in place.
+        """
+        pending = (
+            self.db.query(Trade)
+            .filter(Trade.status == TradeStatus.PENDING)
+            .order_by(Trade.created_at, Trade.id)
         )
+        if symbol is not None:
+            pending = pending.filter(Trade.symbol == symbol)
+        pending_trades = pending.all()
+
+        books: Dict[str, OrderBook] = {}
+        if symbol is not None:
+            books[symbol] = OrderBook(symbol)
+        for db_trade in pending_trades:
+            book = books.get(db_trade.symbol)
+            if book is None:
+                book = books[db_trade.symbol] = OrderBook(db_trade.symbol)
+            book.restore(
+                db_trade.id,
+                db_trade.side,
+                db_trade.price,
+                db_trade.size - db_trade.filled_size,
+            )
+
+        if symbol is None:
+            order_books.replace_all(books)
+        else:
+            order_books.replace(symbol, books[symbol])
+        return len(pending_trades)
+
+    def _get_order_book(self, symbol: str) -> OrderBook:
+        """Get a symbol's book, reloading it first if a resync failed earlier"""
+        if order_books.is_stale(symbol):
+            self.restore_order_books(symbol)
+        return order_books.get(symbol)
+
+    def _recover_order_book(self, symbol: str) -> None:
+        """Roll back a failed write and resync the symbol's book with the database"""
+        try:
+            self.db.rollback()
+            self.restore_order_books(symbol)
+        except Exception:
+            # Keep the caller's original error; reload before the next order
+            order_books.mark_stale(symbol)
 
+    def _execute_order(
+        self, book: OrderBook, db_trade: Trade, is_market: bool
+    ) -> Tuple[List[Trade], Dict[int, Trade], Dict[int, TradeResponse]]:
+        """Match an order against the book and commit the resulting fills"""
         self.db.add(db_trade)
+        self.db.flush()  # Assigns the id used as the order id
+
+        if is_market:
+            fills = book.submit_market(db_trade.id, db_trade.side, db_trade.size)
+        else:
+            fills = book.submit_limit(
+                db_trade.id, db_trade.side, db_trade.price, db_trade.size
+            )
+
+        makers = self._get_maker_trades(fills)
+        previous = {
+            trade_id: TradeResponse.model_validate(maker)
+            for trade_id, maker in makers.items()
+        }
+
+        # All fills from this order are written in a single batch
+        new_trades = [db_trade]
+        for fill in fills:
+            for order_trade in (makers[fill.maker.id], db_trade):
+                new_trades.append(self._apply_fill(order_trade, fill))
+
+        if is_market and db_trade.status == TradeStatus.PENDING:
+            db_trade.status = TradeStatus.CANCELLED  # Immediate-or-cancel
+
+        self.db.add_all(new_trades)
         self.db.commit()
-        self.db.refresh(db_trade)
+        return new_trades, makers, previous
 
-        trade_response = TradeResponse.model_validate(db_trade)
+    def _get_maker_trades(self, fills: List[Fill]) -> Dict[int, Trade]:
+        maker_ids = {fill.maker.id for fill in fills}
+        if not maker_ids:
+            return {}
+        trades = self.db.query(Trade).filter(Trade.id.in_(maker_ids)).all()
+        return {trade.id: trade for trade in trades}
 
-        # Cache the trade
-        await self.cache_service.cache_trade(trade_response)
-        await self.cache_service.cache_trade_by_id(trade_response)
+    def _apply_fill(self, order_trade: Trade, fill: Fill) -> Trade:
+        """Record one side of a fill against an order's trade row.
 
-        return trade_response
+        The order row keeps its original size and limit price and accumulates
+        ``filled_size``, becoming FILLED once fully filled. The fill itself is
+        returned as a new FILLED row linked to the order by ``order_id``.
+        """
+        order_trade.filled_size += fill.size
+        if order_trade.filled_size >= order_trade.size:
+            order_trade.status = TradeStatus.FILLED
+
+        return Trade(
+            symbol=order_trade.symbol,
+            side=order_trade.side,
+            size=fill.size,
+            price=fill.price,
+            leverage=order_trade.leverage,
+            status=TradeStatus.FILLED,
+            filled_size=fill.size,
+            order_id=order_trade.id,
+        )
+
+    async def get_order_fills(self, trade_id: int) -> Optional[List[TradeResponse]]:
+        """Get the fills of an order, oldest first; None if it does not exist"""
+        db_trade = self.db.query(Trade).filter(Trade.id == trade_id).first()
+        if not db_trade:
+            return None
+
+        fills = (
+            self.db.query(Trade)
+            .filter(Trade.order_id == trade_id)
+            .order_by(Trade.id)
+            .all()
+        )
+        return [TradeResponse.model_validate(fill) for fill in fills]
 
     async def get_trade_by_id(self, trade_id: int) -> Optional[TradeResponse]:
         """Get trade by ID (check cache first)"""
@@ -58,9 +231,50 @@ class TradeService:
 
         return None
 
-    async def get_recent_trades(self, limit: int = 20) -> List[TradeResponse]:
-        """Get recent trades from cache"""
-        return await self.cache_service.get_recent_trades(limit)
+    async def get_recent_trades(
+        self,
+        limit: int = 20,
+        symbol: Optional[str] = None,
+        since: Optional[datetime] = None,
+    ) -> List[TradeResponse]:
+        """Get recent trades from cache, optionally by symbol and/or time"""
+        if not (symbol or since):
+            return await self.cache_service.get_recent_trades(limit)
+
+        # Indexes hold ids only; trades come from trade:{id} or the database
+        trade_ids = await self.cache_service.get_indexed_trade_ids(limit, symbol, since)
+        trades = await self.cache_service.get_trades_by_ids(trade_ids)
+
+        missing = [trade_id for trade_id in trade_ids if trade_id not in trades]
+        if missing:
+            db_trades = self.db.query(Trade).filter(Trade.id.in_(missing)).all()
+            for db_trade in db_trades:
+                trade_response = TradeResponse.model_validate(db_trade)
+                await self.cache_service.cache_trade_by_id(trade_response)
+                trades[trade_response.id] = trade_response
+
+        return [trades[trade_id] for trade_id in trade_ids if trade_id in trades]
+
+    async def rebuild_trade_indexes(self, batch_size: int = 1000) -> int:
+        """Rebuild the Redis symbol/time indexes from the database"""
+        await self.cache_service.clear_trade_indexes()
+
+        count = 0
+        batch = []
+        # Oldest first so retention trimming keeps the newest trades
+        trades = self.db.query(Trade).order_by(Trade.created_at, Trade.id)
+        for db_trade in trades.yield_per(batch_size):
+            batch.append(TradeResponse.model_validate(db_trade))
+            if len(batch) >= batch_size:
+                await self.cache_service.index_trades(batch)
+                count += len(batch)
+                batch = []
+
+        if batch:
+            await self.cache_service.index_trades(batch)
+            count += len(batch)
+
+        return count
 
     def simulate_margin_requirements(
         self, simulation: MarginSimulation
@@ -0,0 +1,111 @@
+"""Throughput benchmark for the in-memory order book.
+
+Replays a pre-generated mix of limit orders, market orders and cancels
+against a single symbol's book and reports order operations per second.
+
+    python -m benchmarks.order_book_benchmark --ops 500000
+"""
+
+import argparse
+import random
+import sys
+import time
+from decimal import Decimal
+
+from app.models.trade import TradeSide
+from app.services.order_book import OrderBook
+
+LIMIT, MARKET, CANCEL = 0, 1, 2
+
+
+def generate_operations(count: int, seed: int):
+    """Build a realistic op mix: 70% limit, 5% market, 25% cancel.
+
+    Operations are replayed on a scratch book as they are generated, so every
+    cancel targets an order that is still resting when it runs.
+    """
+    rng = random.Random(seed)
+    tick = Decimal("0.5")
+    mid = 60000  # In ticks
+    sizes = [Decimal(f"0.{n:03d}") for n in range(1, 1000)]
+    book = OrderBook("BTC-PERP")
+    live_ids = []  # May still hold ids that have since filled
+    operations = []
+
+    for order_id in range(1, count + 1):
+        roll = rng.random()
+        side = TradeSide.LONG if rng.random() < 0.5 else TradeSide.SHORT
+        target = None
+        if roll < 0.25:
+            while live_ids and target is None:
+                index = rng.randrange(len(live_ids))
+                live_ids[index], live_ids[-1] = live_ids[-1], live_ids[index]
+                candidate = live_ids.pop()
+                if book.get_order(candidate) is not None:
+                    target = candidate
+
+        if target is not None:
+            book.cancel(target)
+            operations.append((CANCEL, target, None, None, None))
+        elif roll < 0.30:
+            size = rng.choice(sizes)
+            book.submit_market(order_id, side, size)
+            operations.append((MARKET, order_id, side, None, size))
+        else:
+            # Mostly passive prices with some that cross the spread
+            offset = rng.randint(-5, 50)
+            ticks = mid - offset if side is TradeSide.LONG else mid + offset
+            price = ticks * tick
+            size = rng.choice(sizes)
+            book.submit_limit(order_id, side, price, size)
+            operations.append((LIMIT, order_id, side, price, size))
+            if book.get_order(order_id) is not None:
+                live_ids.append(order_id)
+
+    return operations
+
+
+def run(operations):
+    """Replay operations on a fresh book; returns (elapsed seconds, missed cancels)"""
+    book = OrderBook("BTC-PERP")
+    submit_limit = book.submit_limit
+    submit_market = book.submit_market
+    cancel = book.cancel
+    missed_cancels = 0
+
+    start = time.perf_counter()
+    for kind, order_id, side, price, size in operations:
+        if kind == LIMIT:
+            submit_limit(order_id, side, price, size)
+        elif kind == MARKET:
+            submit_market(order_id, side, size)
+        elif cancel(order_id) is None:
+            missed_cancels += 1
+    return time.perf_counter() - start, missed_cancels
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--min-ops-per-second",
+        type=float,
+        default=100_000,
+        help="Exit non-zero if throughput falls below this",
+    )
+    args = parser.parse_args()
+
+    operations = generate_operations(args.ops, args.seed)
+    elapsed, missed_cancels = run(operations)
+    rate = len(operations) / elapsed
+    cancels = sum(1 for operation in operations if operation[0] == CANCEL)
+
+    print(f"{len(operations):,} order operations in {elapsed:.3f}s")
+    print(f"{cancels:,} cancels, {missed_cancels:,} of them on non-resting orders")
+    print(f"{rate:,.0f} ops/sec (target {args.min_ops_per_second:,.0f})")
+    return 0 if rate >= args.min_ops_per_second else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
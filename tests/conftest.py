@@ -7,6 +7,7 @@ from sqlalchemy.orm import sessionmaker
 
 from app.database import Base, get_db
 from app.main import app
+from app.services.order_book import order_books
 
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -38,5 +39,7 @@ def event_loop():
 def client():
     Base.metadata.create_all(bind=engine)
     with TestClient(app) as c:
+        order_books.clear()  # Books are in-memory; start each test empty
         yield c
     Base.metadata.drop_all(bind=engine)
+    order_books.clear()
@@ -1,4 +1,11 @@
+import asyncio
+from decimal import Decimal
+
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Query, Session
+
+from app.services.cache_service import CacheService
+from app.services.order_book import order_books
 
 
 def test_health_check(client: TestClient):
@@ -34,7 +41,7 @@ def test_create_trade_success(client: TestClient):
     data = response.json()
     assert data["symbol"] == "BTC-PERP"
     assert data["side"] == "long"
-    assert data["status"] == "filled"
+    assert data["status"] == "pending"  # Rests on an empty order book
     assert data["leverage"] == 10
     assert "id" in data
     assert "created_at" in data
@@ -66,6 +73,173 @@ def test_create_trade_validation_errors(client: TestClient):
     response = client.post("/trades/", json=invalid_leverage)
     assert response.status_code == 422
 
+    # Size and price beyond the stored column scales
+    for field, value in [("size", "0.123456789"), ("price", "100.005")]:
+        response = client.post(
+            "/trades/", json={**invalid_leverage, "leverage": 10, field: value}
+        )
+        assert response.status_code == 422
+
+
+def test_orders_match_with_partial_fill(client: TestClient):
+    """Test a crossing order fills resting orders at the resting price"""
+    order = {"symbol": "BTC-PERP", "side": "short", "leverage": 10}
+    ask = client.post("/trades/", json={**order, "size": "1.0", "price": "45000.00"})
+    assert ask.json()["status"] == "pending"
+
+    # Buy 0.4 at a higher limit: fills at the resting ask price
+    bid = client.post(
+        "/trades/",
+        json={**order, "side": "long", "size": "0.4", "price": "45100.00"},
+    )
+    assert bid.status_code == 201
+    assert bid.json()["status"] == "filled"
+    assert float(bid.json()["price"]) == 45100.0
+    assert float(bid.json()["filled_size"]) == 0.4
+
+    # Each fill is its own row, linked to its order, at the resting ask price
+    fills = client.get(f"/trades/{bid.json()['id']}/fills").json()
+    assert [fill["order_id"] for fill in fills] == [bid.json()["id"]]
+    assert float(fills[0]["price"]) == 45000.0
+    assert float(fills[0]["size"]) == 0.4
+
+    # The resting ask keeps its original size and records the partial fill
+    data = client.get(f"/trades/{ask.json()['id']}").json()
+    assert data["status"] == "pending"
+    assert float(data["size"]) == 1.0
+    assert float(data["filled_size"]) == 0.4
+    assert data["updated_at"] is not None
+
+    # A market buy larger than the book fills the rest and cancels its remainder
+    market = client.post(
+        "/trades/",
+        json={**order, "side": "long", "size": "1.0", "order_type": "market"},
+    )
+    assert market.json()["status"] == "cancelled"
+    assert float(market.json()["size"]) == 1.0
+    assert float(market.json()["filled_size"]) == 0.6
+    assert client.get(f"/trades/{ask.json()['id']}").json()["status"] == "filled"
+
+    fills = client.get(f"/trades/{ask.json()['id']}/fills").json()
+    assert [float(fill["size"]) for fill in fills] == [0.4, 0.6]
+    assert client.get("/trades/999999/fills").status_code == 404
+
+
+def test_recent_trades_reflect_fills(client: TestClient):
+    """Test unfiltered recent trades show resting orders after a partial fill"""
+    CacheService().redis_client.delete("recent_trades")
+    order = {"symbol": "BTC-PERP", "leverage": 10, "price": "45000.00"}
+    ask_id = client.post(
+        "/trades/", json={**order, "side": "short", "size": "1.0"}
+    ).json()["id"]
+    client.post("/trades/", json={**order, "side": "long", "size": "0.4"})
+
+    data = client.get("/trades/recent?limit=100").json()
+    asks = [trade for trade in data if trade["id"] == ask_id]
+    assert len(asks) == 1
+    assert asks[0]["status"] == "pending"
+    assert float(asks[0]["filled_size"]) == 0.4
+
+    client.post(f"/trades/{ask_id}/cancel")
+    data = client.get("/trades/recent?limit=100").json()
+    assert [t["status"] for t in data if t["id"] == ask_id] == ["cancelled"]
+
+
+def test_failed_commit_resyncs_order_book(client: TestClient, monkeypatch):
+    """Test a failed commit leaves no phantom orders in the book"""
+    order = {"symbol": "BTC-PERP", "leverage": 10, "size": "1.0", "price": "45000.00"}
+    ask_id = client.post("/trades/", json={**order, "side": "short"}).json()["id"]
+
+    def failing_commit(self):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(Session, "commit", failing_commit)
+    response = client.post("/trades/", json={**order, "side": "long"})
+    assert response.status_code == 500
+    monkeypatch.undo()
+
+    # The resting ask is back in the book and the failed bid never rested
+    book = order_books.get("BTC-PERP")
+    assert len(book) == 1
+    assert book.get_order(ask_id).remaining == Decimal("1.0")
+
+    response = client.post("/trades/", json={**order, "side": "long"})
+    assert response.status_code == 201
+    assert response.json()["status"] == "filled"
+    assert client.get(f"/trades/{ask_id}").json()["status"] == "filled"
+
+
+def test_failed_resync_marks_book_stale(client: TestClient, monkeypatch):
+    """Test a book whose reload also fails is reloaded before the next order"""
+    order = {"symbol": "BTC-PERP", "leverage": 10, "size": "1.0", "price": "45000.00"}
+    ask_id = client.post("/trades/", json={**order, "side": "short"}).json()["id"]
+
+    database_down = False
+    query_all = Query.all
+
+    def failing_commit(self):
+        nonlocal database_down
+        database_down = True
+        raise RuntimeError("commit failed")
+
+    def failing_all(self):
+        if database_down:
+            raise RuntimeError("query failed")
+        return query_all(self)
+
+    monkeypatch.setattr(Session, "commit", failing_commit)
+    monkeypatch.setattr(Query, "all", failing_all)
+    response = client.post("/trades/", json={**order, "side": "long"})
+    assert response.status_code == 500
+    assert "commit failed" in response.json()["detail"]  # Original error kept
+    assert order_books.is_stale("BTC-PERP")
+    monkeypatch.undo()
+
+    # The next order reloads the book, so the bid crosses the ask again
+    response = client.post("/trades/", json={**order, "side": "long"})
+    assert response.status_code == 201
+    assert response.json()["status"] == "filled"
+    assert not order_books.is_stale("BTC-PERP")
+    assert client.get(f"/trades/{ask_id}").json()["status"] == "filled"
+
+
+def test_failed_cancel_keeps_order_in_book(client: TestClient, monkeypatch):
+    """Test a cancel whose commit fails leaves the order resting"""
+    order = {"symbol": "ETH-PERP", "leverage": 5, "size": "1.0", "price": "3000.00"}
+    ask_id = client.post("/trades/", json={**order, "side": "short"}).json()["id"]
+
+    def failing_commit(self):
+        raise RuntimeError("commit failed")
+
+    monkeypatch.setattr(Session, "commit", failing_commit)
+    response = client.post(f"/trades/{ask_id}/cancel")
+    assert response.status_code == 500
+    assert "Failed to cancel trade" in response.json()["detail"]
+    monkeypatch.undo()
+
+    assert order_books.get("ETH-PERP").get_order(ask_id) is not None
+    response = client.post("/trades/", json={**order, "side": "long"})
+    assert response.json()["status"] == "filled"
+
+
+def test_cancel_and_market_order_errors(client: TestClient):
+    """Test cancelling resting orders and rejecting unfillable market orders"""
+    order = {"symbol": "SOL-PERP", "side": "long", "size": "10.0", "leverage": 3}
+
+    response = client.post("/trades/", json={**order, "order_type": "market"})
+    assert response.status_code == 409
+
+    response = client.post("/trades/", json=order)
+    assert response.status_code == 422  # Limit orders need a price
+
+    trade_id = client.post("/trades/", json={**order, "price": "100.00"}).json()["id"]
+    response = client.post(f"/trades/{trade_id}/cancel")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+
+    assert client.post(f"/trades/{trade_id}/cancel").status_code == 409
+    assert client.post("/trades/999999/cancel").status_code == 404
+
 
 def test_get_trade_by_id(client: TestClient):
     """Test retrieving a trade by ID"""
@@ -188,3 +362,103 @@ def test_api_openapi_schema(client: TestClient):
     assert "openapi" in schema
     assert "info" in schema
     assert schema["info"]["title"] == "Crypto Derivatives Trade Tracker"
+
+
+def test_profiling_requires_token(client: TestClient, monkeypatch):
+    """Test that profiling endpoints are disabled or protected by a token"""
+    from app.config import settings
+
+    response = client.post("/admin/profiling/sessions", json={"route": "/trades/"})
+    assert response.status_code == 404
+
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "secret")
+    response = client.post(
+        "/admin/profiling/sessions",
+        json={"route": "/trades/"},
+        headers={"X-Profiling-Token": "wrong"},
+    )
+    assert response.status_code == 401
+
+    response = client.post(
+        "/admin/profiling/sessions",
+        json={"route": "/trades/{trade_id:foo}"},
+        headers={"X-Profiling-Token": "secret"},
+    )
+    assert response.status_code == 422
+
+
+def test_profiling_session_lifecycle(client: TestClient, monkeypatch):
+    """Test profiling the next N requests on a route and downloading samples"""
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "secret")
+    headers = {"X-Profiling-Token": "secret"}
+
+    response = client.post(
+        "/admin/profiling/sessions",
+        json={"route": "/trades/simulate-margin", "requests": 3, "interval_ms": 1},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    session_id = response.json()["id"]
+    assert response.json()["status"] == "active"
+
+    margin_data = {
+        "symbol": "BTC-PERP",
+        "side": "long",
+        "size": "0.1",
+        "price": "50000.00",
+        "leverage": 10,
+    }
+    for _ in range(3):
+        client.post("/trades/simulate-margin", json=margin_data)
+
+    response = client.get(f"/admin/profiling/sessions/{session_id}", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "completed"
+    assert data["requests_profiled"] == 3
+
+    response = client.get(
+        f"/admin/profiling/sessions/{session_id}/flamegraph", headers=headers
+    )
+    assert response.status_code == 200
+    assert "attachment" in response.headers["content-disposition"]
+    for line in response.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+
+
+def test_get_recent_trades_by_symbol(client: TestClient):
+    """Test filtering recent trades by symbol and creation time"""
+    asyncio.run(CacheService().clear_trade_indexes())
+
+    eth_ids = []
+    for symbol in ["BTC-PERP", "ETH-PERP", "ETH-PERP"]:
+        response = client.post(
+            "/trades/",
+            json={
+                "symbol": symbol,
+                "side": "long",
+                "size": "1.0",
+                "price": "3000.00",
+                "leverage": 5,
+            },
+        )
+        if symbol == "ETH-PERP":
+            eth_ids.append(response.json()["id"])
+
+    response = client.get("/trades/recent?symbol=ETH-PERP&limit=50")
+    assert response.status_code == 200
+    data = response.json()
+    assert sorted(trade["id"] for trade in data) == eth_ids
+    # Newest first
+    assert data[0]["created_at"] >= data[-1]["created_at"]
+
+    response = client.get("/trades/recent?since=2100-01-01T00:00:00Z")
+    assert response.status_code == 200
+    assert response.json() == []
+
+    for limit in (0, -1, 101):
+        response = client.get(f"/trades/recent?symbol=ETH-PERP&limit={limit}")
+        assert response.status_code == 422
@@ -1,8 +1,21 @@
+import asyncio
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
-from app.models.trade import TradeSide
+import pytest
+
+from app.models.trade import Trade, TradeSide, TradeStatus
+from app.schemas.profiling import ProfilingSessionCreate
 from app.schemas.trade import MarginSimulation
+from app.services import profiler_service
+from app.services.cache_service import CacheService, to_epoch
+from app.services.order_book import OrderBook, order_books
+from app.services.profiler_service import ProfilingSession, collapse_stack
 from app.services.trade_service import TradeService
+from tests.conftest import TestingSessionLocal
 
 
 class TestTradeService:
@@ -93,3 +106,276 @@ class TestTradeService:
             assert result.required_margin == Decimal(
                 "100.00"
             )  # Same calculation regardless of symbol
+
+
+class TestProfilerService:
+
+    def test_reports_blocking_call_on_event_loop(self):
+        """Test that a synchronous call stalling the loop is reported"""
+
+        async def run_blocking_session():
+            session = ProfilingSession(
+                ProfilingSessionCreate(
+                    route="/trades/", interval_ms=2, block_threshold_ms=20
+                ),
+                threading.get_ident(),
+            )
+            session.start()
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)  # Simulates a sync Redis call on the loop
+            await asyncio.sleep(0.02)
+            session.stop()
+            await asyncio.sleep(0.01)
+            assert session._heartbeat_task.done()
+            return session
+
+        session = asyncio.run(run_blocking_session())
+
+        assert len(session.slow_calls) == 1
+        slow_call = session.slow_calls[0]
+        assert slow_call.duration_ms >= 20
+        assert "run_blocking_session" in slow_call.location
+        assert slow_call.stack.endswith("run_blocking_session")
+
+    def test_stalls_beyond_cap_do_not_overwrite_recorded_ones(self, monkeypatch):
+        """Test an unrecorded stall leaves the last recorded duration alone"""
+        monkeypatch.setattr(profiler_service, "MAX_SLOW_CALLS", 1)
+
+        async def run_two_stalls():
+            session = ProfilingSession(
+                ProfilingSessionCreate(
+                    route="/trades/", interval_ms=2, block_threshold_ms=20
+                ),
+                threading.get_ident(),
+            )
+            session.start()
+            await asyncio.sleep(0.02)
+            time.sleep(0.05)
+            await asyncio.sleep(0.02)
+            first_duration = session.slow_calls[0].duration_ms
+            time.sleep(0.2)  # Longer stall that is over the cap
+            await asyncio.sleep(0.02)
+            session.stop()
+            return session, first_duration
+
+        session, first_duration = asyncio.run(run_two_stalls())
+
+        assert len(session.slow_calls) == 1
+        assert session.slow_calls[0].duration_ms == first_duration
+        assert first_duration < 150
+
+    def test_collapse_stack_is_root_first(self):
+        """Test collapsed stacks list the outermost frame first"""
+
+        def inner():
+            return collapse_stack(sys._getframe())
+
+        stack = inner().split(";")
+        assert stack[-1].endswith("inner")
+        assert stack[-2].endswith("test_collapse_stack_is_root_first")
+
+
+class TestCacheService:
+
+    def test_to_epoch_treats_naive_datetimes_as_utc(self):
+        """Test index scores match for naive and UTC-aware timestamps"""
+        naive = datetime(2025, 1, 1, 12, 0, 0)
+        aware = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+        assert to_epoch(naive) == to_epoch(aware) == 1735732800.0
+
+
+class TestOrderBook:
+
+    def test_price_time_priority(self):
+        """Test better prices fill first, then earlier orders at a price"""
+        book = OrderBook("BTC-PERP")
+        book.submit_limit(1, TradeSide.SHORT, Decimal("101"), Decimal("1"))
+        book.submit_limit(2, TradeSide.SHORT, Decimal("100"), Decimal("1"))
+        book.submit_limit(3, TradeSide.SHORT, Decimal("100"), Decimal("1"))
+
+        fills = book.submit_limit(4, TradeSide.LONG, Decimal("101"), Decimal("2.5"))
+
+        assert [(f.maker.id, f.price, f.size) for f in fills] == [
+            (2, Decimal("100"), Decimal("1")),
+            (3, Decimal("100"), Decimal("1")),
+            (1, Decimal("101"), Decimal("0.5")),
+        ]
+        assert book.best_ask() == Decimal("101")
+        assert book.get_order(1).remaining == Decimal("0.5")
+        assert book.best_bid() is None  # Taker was fully filled
+
+    def test_limit_remainder_rests_without_crossing(self):
+        """Test a limit order only matches up to its price and rests the rest"""
+        book = OrderBook("ETH-PERP")
+        book.submit_limit(1, TradeSide.LONG, Decimal("3000"), Decimal("1"))
+
+        fills = book.submit_limit(2, TradeSide.SHORT, Decimal("3001"), Decimal("1"))
+
+        assert fills == []
+        assert book.best_bid() == Decimal("3000")
+        assert book.best_ask() == Decimal("3001")
+        assert len(book) == 2
+
+    def test_market_order_is_immediate_or_cancel(self):
+        """Test market orders sweep the book and never rest"""
+        book = OrderBook("SOL-PERP")
+        book.submit_limit(1, TradeSide.LONG, Decimal("99"), Decimal("2"))
+        book.submit_limit(2, TradeSide.LONG, Decimal("100"), Decimal("1"))
+
+        fills = book.submit_market(3, TradeSide.SHORT, Decimal("5"))
+
+        assert [(f.maker.id, f.size) for f in fills] == [
+            (2, Decimal("1")),
+            (1, Decimal("2")),
+        ]
+        assert len(book) == 0
+        assert book.best_bid() is None and book.best_ask() is None
+
+    def test_restore_skips_orders_with_no_remaining_size(self):
+        """Test restoring an exhausted order does not leave a phantom level"""
+        book = OrderBook("BTC-PERP")
+        book.restore(1, TradeSide.SHORT, Decimal("100"), Decimal("0E-8"))
+        book.restore(2, TradeSide.SHORT, Decimal("101"), Decimal("1"))
+
+        assert len(book) == 1
+        assert book.best_ask() == Decimal("101")
+
+        fills = book.submit_limit(3, TradeSide.LONG, Decimal("101"), Decimal("1"))
+        assert [f.maker.id for f in fills] == [2]
+
+    def test_cancel_removes_order_and_empty_level(self):
+        """Test cancelled orders are skipped and empty levels disappear"""
+        book = OrderBook("BTC-PERP")
+        book.submit_limit(1, TradeSide.SHORT, Decimal("100"), Decimal("1"))
+        book.submit_limit(2, TradeSide.SHORT, Decimal("100"), Decimal("1"))
+        book.submit_limit(3, TradeSide.SHORT, Decimal("102"), Decimal("1"))
+
+        assert book.cancel(1).remaining == Decimal("1")
+        assert book.cancel(1) is None
+
+        fills = book.submit_limit(4, TradeSide.LONG, Decimal("100"), Decimal("1"))
+        assert [f.maker.id for f in fills] == [2]
+
+        book.cancel(3)
+        assert book.best_ask() is None
+        assert len(book) == 0
+
+
+def test_restore_rests_unfilled_remainder(client):
+    """Test restarting rebuilds books from the unfilled part of pending orders"""
+    db = TestingSessionLocal()
+    db.add(
+        Trade(
+            symbol="BTC-PERP",
+            side=TradeSide.SHORT,
+            size=Decimal("1.0"),
+            price=Decimal("45000.00"),
+            status=TradeStatus.PENDING,
+            filled_size=Decimal("0.4"),
+        )
+    )
+    db.commit()
+
+    assert TradeService(db, cache_service=None).restore_order_books() == 1
+    book = order_books.get("BTC-PERP")
+    assert book.get_order(1).remaining == Decimal("0.6")
+    db.close()
+
+
+@pytest.fixture
+def indexed_trades(client):
+    """Insert trades one minute apart and rebuild the Redis indexes from them"""
+    db = TestingSessionLocal()
+    start = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    symbols = ["ETH-PERP", "BTC-PERP", "ETH-PERP", "BTC-PERP", "ETH-PERP"]
+    for minute, symbol in enumerate(symbols):
+        db.add(
+            Trade(
+                symbol=symbol,
+                side=TradeSide.LONG,
+                size=Decimal("1.0"),
+                price=Decimal("100.00"),
+                status=TradeStatus.FILLED,
+                created_at=start + timedelta(minutes=minute),
+            )
+        )
+    db.commit()
+
+    trade_service = TradeService(db, CacheService())
+    asyncio.run(trade_service.cache_service.clear_trade_indexes())
+    # Drop trade:{id} entries left by earlier tests that reused these ids
+    trade_service.cache_service.redis_client.delete(
+        *[f"trade:{trade_id}" for trade_id in range(1, len(symbols) + 1)]
+    )
+    yield trade_service, start
+    db.close()
+
+
+def indexed_ids(cache_service, symbol=None, limit=10):
+    return asyncio.run(cache_service.get_indexed_trade_ids(limit, symbol))
+
+
+class TestTradeIndexes:
+
+    def test_rebuild_restores_symbol_index_newest_first(self, indexed_trades):
+        """Test rebuilding from the database repopulates per-symbol indexes"""
+        trade_service, _ = indexed_trades
+        cache_service = trade_service.cache_service
+
+        assert indexed_ids(cache_service, "ETH-PERP") == []
+
+        assert asyncio.run(trade_service.rebuild_trade_indexes(batch_size=2)) == 5
+
+        assert indexed_ids(cache_service, "ETH-PERP") == [5, 3, 1]
+        assert indexed_ids(cache_service, "BTC-PERP") == [4, 2]
+
+    def test_indexed_trades_reflect_current_state(self, indexed_trades):
+        """Test state changes show up without touching the index"""
+        trade_service, _ = indexed_trades
+        asyncio.run(trade_service.rebuild_trade_indexes())
+
+        # Changed outside the cache path; the index only holds the id
+        db_trade = trade_service.db.query(Trade).filter(Trade.id == 3).first()
+        db_trade.status = TradeStatus.CANCELLED
+        trade_service.db.commit()
+
+        trades = asyncio.run(trade_service.get_recent_trades(10, "ETH-PERP"))
+        assert [trade.id for trade in trades] == [5, 3, 1]
+        assert trades[1].status == TradeStatus.CANCELLED
+
+        # Hydrated trades are cached by id for the next read
+        cached = asyncio.run(trade_service.cache_service.get_trades_by_ids([5, 3, 1]))
+        assert sorted(cached) == [1, 3, 5]
+
+    def test_non_positive_limit_returns_nothing(self, indexed_trades):
+        """Test a negative count is not treated as unbounded by Redis"""
+        trade_service, _ = indexed_trades
+        asyncio.run(trade_service.rebuild_trade_indexes())
+
+        assert indexed_ids(trade_service.cache_service, limit=-1) == []
+
+    def test_since_splits_trades(self, indexed_trades, client):
+        """Test since returns only trades created at or after it"""
+        trade_service, start = indexed_trades
+        asyncio.run(trade_service.rebuild_trade_indexes())
+
+        since = (start + timedelta(minutes=2)).isoformat()
+        response = client.get("/trades/recent", params={"since": since})
+        assert [trade["id"] for trade in response.json()] == [5, 4, 3]
+
+        response = client.get(
+            "/trades/recent", params={"symbol": "BTC-PERP", "since": since}
+        )
+        assert [trade["id"] for trade in response.json()] == [4]
+
+    def test_retention_keeps_newest_trades(self, indexed_trades):
+        """Test each index is trimmed to the newest max_indexed_trades"""
+        trade_service, _ = indexed_trades
+        cache_service = trade_service.cache_service
+        cache_service.max_indexed_trades = 2
+
+        asyncio.run(trade_service.rebuild_trade_indexes(batch_size=1))
+
+        assert indexed_ids(cache_service) == [5, 4]
+        assert indexed_ids(cache_service, "ETH-PERP") == [5, 3]